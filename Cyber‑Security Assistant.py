@@ -13,22 +13,53 @@ The service
   • can run in batch mode (CSV input → single report),
   • exposes a REST endpoint (`/recommend`) for on‑the‑fly queries.
 
+Ollama server tuning
+--------------------
+`/batch` fans out one chat request per threat concurrently, so the
+Ollama server should be started with enough parallel slots:
+
+  OLLAMA_NUM_PARALLEL       – concurrent requests served per loaded model
+                              (e.g. `OLLAMA_NUM_PARALLEL=8 ollama serve`).
+                              Read by this service too (default 8) to cap
+                              its own in‑flight chats at the same number.
+  OLLAMA_MAX_LOADED_MODELS  – models kept resident at once; 1 is enough
+                              for this service and leaves VRAM for slots.
+
+The served model is read from `CYBER_MODEL` (default `gpt-oss:20b`).
+The stock gpt‑oss:20b tag already ships 4‑bit MXFP4 weights (~13 GB on
+disk, ~16 GB VRAM), roughly half of an 8‑bit build.  Point `CYBER_MODEL`
+at a Q4_K_M / Q5_K_M tag to trade accuracy for throughput on other
+models, or at a Q8_0 tag for high‑accuracy work (about twice the VRAM).
+
 Author:  Thomas Yiu and gpt oss 20b
 Date:    2025‑09‑05
 """
 
 import os
+import re
 import csv
-import json
+import asyncio
+import atexit
+import hashlib
+import importlib.util
 import logging
+import logging.handlers
+import queue
+import socket
+import sqlite3
+import threading
+import time
 import traceback
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
+import httpx
 import ollama  # pip install ollama
-from fastapi import FastAPI, HTTPException, Body, Query
-from pydantic import BaseModel, Field, validator
-from fastapi.responses import JSONResponse
+import orjson  # pip install orjson
+from fastapi import FastAPI, HTTPException, Body, Query, Response
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, validator
+from fastapi.responses import ORJSONResponse
 from starlette.status import HTTP_422_UNPROCESSABLE_ENTITY
 
 # ----------------------------------------------------------------------
@@ -54,44 +85,278 @@ formatter = logging.Formatter(
     "%(asctime)s | %(levelname)s | %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
 )
 handler.setFormatter(formatter)
-logger.addHandler(handler)
+# The file write happens on the listener thread, never on the event loop;
+# request handlers only enqueue the record.
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener = logging.handlers.QueueListener(_log_queue, handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+# ----------------------------------------------------------------------
+# Audit Sink
+# ----------------------------------------------------------------------
+AUDIT_FLUSH_INTERVAL = 0.05  # seconds
+AUDIT_FLUSH_MAX_ENTRIES = 128
+
+
+class AuditSink:
+    """
+    Group‑commit writer for recommendation audit entries.  `put()` only
+    enqueues; a background task writes everything that arrives within
+    `flush_interval` (or up to `max_entries` lines) with a single
+    `write()` + `fsync()` on the default executor.  A failed write is
+    logged (with the lost entries) and the sink keeps running; `healthy`
+    reports it so `/healthz` can surface the problem.
+    """
+
+    def __init__(self, path: Path, flush_interval: float, max_entries: int):
+        self._path = path
+        self._flush_interval = flush_interval
+        self._max_entries = max_entries
+        self._queue: "Optional[asyncio.Queue[Optional[str]]]" = None
+        self._task: "Optional[asyncio.Task[None]]" = None
+        self._fp = None
+        self._write_error: Optional[str] = None
+
+    def start(self) -> None:
+        self._fp = open(self._path, "a", encoding="utf-8")
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    def put(self, entry: Dict[str, Any]) -> None:
+        message = orjson.dumps(entry).decode()
+        if self._queue is None:
+            # Not running inside the app (e.g. imported as a library)
+            logger.info(message)
+            return
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        self._queue.put_nowait(f"{timestamp} | INFO | {message}")
+
+    @property
+    def healthy(self) -> bool:
+        """False if the writer task has died or the last write failed."""
+        return (
+            self._task is not None
+            and not self._task.done()
+            and self._write_error is None
+        )
+
+    def _write(self, lines: List[str]) -> None:
+        self._fp.write("\n".join(lines) + "\n")
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            lines: List[str] = []
+            line = await self._queue.get()
+            deadline = loop.time() + self._flush_interval
+            while True:
+                if line is None:  # sentinel from stop()
+                    stopping = True
+                    break
+                lines.append(line)
+                timeout = deadline - loop.time()
+                if len(lines) >= self._max_entries or timeout <= 0:
+                    break
+                try:
+                    line = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if lines:
+                await self._flush(loop, lines)
+
+    async def _flush(self, loop: asyncio.AbstractEventLoop, lines: List[str]) -> None:
+        try:
+            await loop.run_in_executor(None, self._write, lines)
+        except Exception as exc:
+            # Disk full, EIO … – keep the entries visible through the logger
+            # (its handler reports to stderr if the file is unwritable too).
+            self._write_error = str(exc)
+            logger.error(f"Audit log write failed: {exc}")
+            for line in lines:
+                logger.error(f"Unwritten audit entry: {line}")
+        else:
+            self._write_error = None
+
+    async def stop(self) -> None:
+        """Flush everything still queued and close the file."""
+        if self._task is None:
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        self._fp.close()
+        self._queue = self._task = self._fp = None
+
+
+audit_sink = AuditSink(AUDIT_LOG_PATH, AUDIT_FLUSH_INTERVAL, AUDIT_FLUSH_MAX_ENTRIES)
 
 # ----------------------------------------------------------------------
 # Ollama Client
 # ----------------------------------------------------------------------
 # Default Ollama port is 11434. If you run it elsewhere, change the host.
+OLLAMA_HOST = "http://localhost:11434"
+# Keep‑alive pool shared by every request; the async client itself is
+# created on app startup (see `_open_ollama_client`), once per worker.
+OLLAMA_POOL_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=64)
+# HTTP/2 multiplexes concurrent chats over one socket.  httpx only uses it
+# over TLS (e.g. Ollama behind an HTTPS proxy) and only if `h2` is
+# installed (`pip install httpx[http2]`); otherwise the keep‑alive pool
+# above – larger than OLLAMA_NUM_PARALLEL – avoids reconnects.
+OLLAMA_HTTP2 = importlib.util.find_spec("h2") is not None
+# Match the server's `OLLAMA_NUM_PARALLEL`: enough concurrent chats to keep
+# it saturated, but no more, so extra work waits here instead of in its queue.
+OLLAMA_NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "8"))
 try:
-    ollama_client = ollama.Client(host="http://localhost:11434")
-    # Quick health‑check
-    ollama_client.ping()
+    # Quick health‑check with a throw‑away sync client
+    ollama.Client(host=OLLAMA_HOST).list()
 except Exception as exc:
     logger.critical(f"Failed to connect to Ollama: {exc}")
     raise SystemExit("Ollama server not reachable. Install/start Ollama first.") from exc
 
-MODEL = "gpt-oss:20b"
+MODEL = os.getenv("CYBER_MODEL", "gpt-oss:20b")
+# How long Ollama keeps the model resident after each call.  Passed on every
+# request so the idle timer never drops back to the server default (5 min);
+# start the server with `OLLAMA_KEEP_ALIVE=-1` to pin it indefinitely.
+MODEL_KEEP_ALIVE = "24h"
+
+# Generation limits – the prompt asks for a single paragraph, so cap the
+# output.  `num_ctx` is fixed rather than sized per prompt: Ollama reloads
+# the model runner whenever it changes, which would serialize concurrent
+# chats.  The warm‑up uses the same value so the first request doesn't reload.
+RECOMMEND_NUM_PREDICT = 256
+BATCH_NUM_PREDICT = 160
+MODEL_NUM_CTX = int(os.getenv("CYBER_NUM_CTX", "4096"))
+
+# Deny unconfirmed requests whose threat description already contains a
+# destructive verb without asking the model at all (set CYBER_FAST_DENY=0
+# to always generate first).
+FAST_DENY = os.getenv("CYBER_FAST_DENY", "1") != "0"
+
+# ----------------------------------------------------------------------
+# Response Cache
+# ----------------------------------------------------------------------
+# Bump whenever `_generate_prompt` changes so stale answers are not reused.
+PROMPT_VERSION = "2"
+CACHE_DB_PATH = LOG_DIR / "cache.db"
+CACHE_MAX_ENTRIES = 8192
+
+
+class ResponseCache:
+    """
+    Content‑addressed recommendation cache: an in‑process LRU in front of
+    a SQLite table, keyed by the SHA‑256 of model, prompt version and prompt.
+    """
+
+    def __init__(self, db_path: Path, max_entries: int):
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        os.chmod(db_path, 0o600)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "hash TEXT PRIMARY KEY, recommendation TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def key(prompt: str, num_predict: int) -> str:
+        digest = hashlib.sha256()
+        for part in (MODEL, PROMPT_VERSION, str(num_predict), SYSTEM_MSG["content"], prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _remember(self, key: str, recommendation: str) -> None:
+        self._memory[key] = recommendation
+        self._memory.move_to_end(key)
+        if len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+
+    def _select(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT recommendation FROM responses WHERE hash = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _insert(self, key: str, recommendation: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                (key, recommendation, time.time()),
+            )
+            self._db.commit()
+
+    async def get(self, key: str) -> Optional[str]:
+        recommendation = self._memory.get(key)
+        if recommendation is not None:
+            self._memory.move_to_end(key)
+            return recommendation
+        loop = asyncio.get_running_loop()
+        recommendation = await loop.run_in_executor(None, self._select, key)
+        if recommendation is not None:
+            self._remember(key, recommendation)
+        return recommendation
+
+    async def put(self, key: str, recommendation: str) -> None:
+        self._remember(key, recommendation)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._insert, key, recommendation)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+# Lives for the whole process (the app may start and stop several times)
+response_cache = ResponseCache(CACHE_DB_PATH, CACHE_MAX_ENTRIES)
+atexit.register(response_cache.close)
 
 # ----------------------------------------------------------------------
 # Helper Functions
 # ----------------------------------------------------------------------
-def _generate_prompt(threat_info: Dict[str, Any]) -> str:
-    """Create the system+user prompt that will be sent to the model."""
-    system = "You are a cybersecurity assistant specialized in AV/EDR."
-    user = (
-        f"Threat Data:\n"
-        f"{json.dumps(threat_info, indent=2)}\n\n"
-        f"Provide a concise recommendation that includes "
-        f"what to do, why it matters, and if it is destructive "
-        f"(mention 'delete', 'remove', 'kill', etc.). "
-        f"Return the recommendation in a single paragraph."
-    )
-    return {"system": system, "user": user}
+# The system role never changes, so the message dict is built once.
+SYSTEM_MSG = {
+    "role": "system",
+    "content": "You are a cybersecurity assistant specialized in AV/EDR.",
+}
+
+
+# User prompt with a single slot for the threat JSON; rendered per request
+# by plain substitution.
+_USER_TMPL = (
+    "Threat Data:\n"
+    "{body}\n\n"
+    "Provide a concise recommendation that includes "
+    "what to do, why it matters, and if it is destructive "
+    "(mention 'delete', 'remove', 'kill', etc.). "
+    "Return the recommendation in a single paragraph."
+)
+
+
+def _generate_prompt(threat: "Threat") -> str:
+    """Create the user prompt that is sent to the model after `SYSTEM_MSG`."""
+    body = threat.model_dump_json(exclude_none=True, indent=2)
+    return _USER_TMPL.format_map({"body": body})
+
+
+# Destructive verbs in any inflection ("delete,", "removing", "killed" …),
+# matched in a single pass over the raw text.
+_DESTRUCTIVE_RE = re.compile(
+    r"\b(delet\w*|remov\w*|kill\w*|uninstall\w*|eras\w*|wipe\w*|format\w*)\b",
+    re.IGNORECASE,
+)
 
 
 def _is_destructive(recommendation: str) -> bool:
     """Naive check – look for destructive keywords."""
-    destructive_terms = {"delete", "remove", "kill", "uninstall", "erase"}
-    words = set(recommendation.lower().split())
-    return bool(words & destructive_terms)
+    return _DESTRUCTIVE_RE.search(recommendation) is not None
 
 
 def _log_recommendation(
@@ -109,7 +374,7 @@ def _log_recommendation(
         "approved": approved,
         "notes": notes,
     }
-    logger.info(json.dumps(entry))
+    audit_sink.put(entry)
 
 
 def _ask_confirmation(action: str, threat_id: str) -> bool:
@@ -125,15 +390,115 @@ def _ask_confirmation(action: str, threat_id: str) -> bool:
     return False
 
 
+def _pre_deny(request: "RecommendRequest") -> None:
+    """
+    Refuse before any model call when the caller has not confirmed and the
+    threat description already names a destructive action.  This is a
+    conservative shortcut: the recommendation itself might still have been
+    non‑destructive (e.g. "isolate the host"), so set `CYBER_FAST_DENY=0`
+    to always ask the model first.
+    """
+    if not FAST_DENY or request.confirm:
+        return
+    if _DESTRUCTIVE_RE.search(request.threat.description or "") is None:
+        return
+    _log_recommendation(
+        request.threat.threat_id,
+        "",
+        True,
+        False,
+        "pre-denied: destructive keywords in threat description",
+    )
+    raise HTTPException(
+        status_code=400,
+        detail="Destructive recommendation requires explicit confirmation.",
+    )
+
+
 # ----------------------------------------------------------------------
 # FastAPI Application
 # ----------------------------------------------------------------------
 app = FastAPI(
+    default_response_class=ORJSONResponse,
     title="Cyber‑Security Assistant API",
     description="Generate AV/EDR recommendations with safety checks, audit logging, and batch reporting.",
     version="1.0.0",
 )
 
+
+@app.on_event("startup")
+async def _open_ollama_client() -> None:
+    """Create one pooled async client and reuse its connections for every call."""
+    transport = httpx.AsyncHTTPTransport(
+        http2=OLLAMA_HTTP2,
+        limits=OLLAMA_POOL_LIMITS,
+        retries=1,
+        # Send small request bodies immediately instead of waiting on Nagle
+        socket_options=[(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)],
+    )
+    app.state.ollama = ollama.AsyncClient(host=OLLAMA_HOST, transport=transport)
+    app.state.ollama_slots = asyncio.Semaphore(OLLAMA_NUM_PARALLEL)
+
+
+# Warm‑up retry backoff (seconds): doubles after each failure up to the cap
+WARMUP_RETRY_INITIAL = 1.0
+WARMUP_RETRY_MAX = 60.0
+
+
+async def _warm_up_model() -> None:
+    """
+    Load the model into memory so the first real request isn't a cold start.
+    Retries with exponential backoff (e.g. model not pulled yet, Ollama
+    restarting) until it succeeds or the app shuts down.
+    """
+    delay = WARMUP_RETRY_INITIAL
+    while True:
+        try:
+            # Fails fast if the model hasn't been pulled
+            await app.state.ollama.show(MODEL)
+            await app.state.ollama.generate(
+                model=MODEL,
+                prompt="warmup",
+                options=_generation_options(1),
+                keep_alive=MODEL_KEEP_ALIVE,
+            )
+            break
+        except Exception as exc:
+            logger.critical(
+                f"Model warm‑up failed for {MODEL}: {exc}; retrying in {delay:.0f}s"
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WARMUP_RETRY_MAX)
+    app.state.model_ready = True
+    logger.info(f"Model {MODEL} loaded and pinned for {MODEL_KEEP_ALIVE}")
+
+
+@app.on_event("startup")
+async def _preload_model() -> None:
+    """Warm the model in the background; `/healthz` reports 503 until done."""
+    app.state.model_ready = False
+    app.state.warmup = asyncio.create_task(_warm_up_model())
+
+
+@app.on_event("shutdown")
+async def _close_ollama_client() -> None:
+    """Release the pooled connections."""
+    app.state.warmup.cancel()
+    await app.state.ollama._client.aclose()
+
+
+@app.on_event("startup")
+async def _start_audit_sink() -> None:
+    """Start the background group‑commit task for audit entries."""
+    audit_sink.start()
+
+
+@app.on_event("shutdown")
+async def _drain_audit_sink() -> None:
+    """Write out any audit entries still waiting for a group commit."""
+    await audit_sink.stop()
+
+
 # ----------------------------------------------------------------------
 # Data Models
 # ----------------------------------------------------------------------
@@ -147,6 +512,10 @@ class Threat(BaseModel):
     additional_info: Optional[Dict[str, Any]] = None
 
 
+# Validates a whole list of threats in one call instead of one model at a time
+THREATS_ADAPTER = TypeAdapter(List[Threat])
+
+
 class RecommendationResponse(BaseModel):
     threat_id: str
     recommendation: str
@@ -171,37 +540,107 @@ class RecommendRequest(BaseModel):
     )
 
 
-class RecommendResponse(BaseModel):
-    threat_id: str
-    recommendation: str
-    destructive: bool
-    approved: bool
-    notes: Optional[str] = None
+class RecommendResponse(RecommendationResponse):
+    """Same fields as a batch report entry, so it can be used as one as‑is."""
 
 
 # ----------------------------------------------------------------------
 # REST End‑points
 # ----------------------------------------------------------------------
-@app.post("/recommend", response_model=RecommendResponse)
-async def recommend(request: RecommendRequest):
-    """Generate recommendation for a single threat."""
-    try:
-        # Build the prompt
-        prompt = _generate_prompt(request.threat.model_dump())
-        # Send to Ollama
-        response = ollama_client.chat.completions.create(
-            model=MODEL, messages=[
-                {"role": "system", "content": prompt["system"]},
-                {"role": "user", "content": prompt["user"]},
-            ]
+def _generation_options(num_predict: int) -> Dict[str, Any]:
+    """Sampling options; everything but `num_predict` is the same for every call."""
+    return {
+        "num_predict": num_predict,
+        "num_ctx": MODEL_NUM_CTX,
+        "temperature": 0.2,
+        "top_p": 0.9,
+        "stop": ["\n\n"],
+    }
+
+
+# Re‑check the streamed text for destructive verbs every N chunks (~tokens).
+STREAM_CHECK_EVERY = 64
+
+
+async def _chat(
+    prompt: str,
+    num_predict: int = RECOMMEND_NUM_PREDICT,
+    stop_on_destructive: bool = False,
+) -> Tuple[str, bool]:
+    """
+    Stream one user prompt (after `SYSTEM_MSG`) through Ollama and return
+    `(reply_text, complete)`.  With `stop_on_destructive` the stream is
+    closed – which cancels decoding on the server – as soon as the partial
+    reply matches `_DESTRUCTIVE_RE`; `complete` is then False.  An empty
+    reply (e.g. the output budget spent on reasoning, or an early stop
+    sequence) raises instead of passing review as a safe recommendation.
+    """
+    # Never have more chats in flight than the server has slots
+    async with app.state.ollama_slots:
+        stream = await app.state.ollama.chat(
+            model=MODEL,
+            messages=[SYSTEM_MSG, {"role": "user", "content": prompt}],
+            options=_generation_options(num_predict),
+            keep_alive=MODEL_KEEP_ALIVE,
+            stream=True,
         )
-        recommendation = response.choices[0].message.content.strip()
-    except Exception as exc:
-        logger.error(f"Model error for {request.threat.threat_id}: {exc}")
-        raise HTTPException(
-            status_code=500, detail=f"Model generation failed: {exc}"
+        parts: List[str] = []
+        try:
+            async for chunk in stream:
+                parts.append(chunk["message"]["content"])
+                if (
+                    stop_on_destructive
+                    and len(parts) % STREAM_CHECK_EVERY == 0
+                    and _DESTRUCTIVE_RE.search("".join(parts))
+                ):
+                    return "".join(parts).strip(), False
+        finally:
+            await stream.aclose()
+        recommendation = "".join(parts).strip()
+        if not recommendation:
+            raise RuntimeError("model returned an empty recommendation")
+        return recommendation, True
+
+
+# Cache lookups / model calls currently running, keyed by (prompt hash,
+# stop_on_destructive); identical prompts in flight at the same time – e.g.
+# duplicate rows in one /batch – share a single model call.
+_inflight_chats: "Dict[Tuple[str, bool], asyncio.Future[str]]" = {}
+
+
+async def _lookup_or_chat(
+    prompt_hash: str, prompt: str, num_predict: int, stop_on_destructive: bool
+) -> str:
+    recommendation = await response_cache.get(prompt_hash)
+    if not recommendation:
+        recommendation, complete = await _chat(prompt, num_predict, stop_on_destructive)
+        # Truncated (denied) and empty replies are never cached
+        if complete and recommendation:
+            await response_cache.put(prompt_hash, recommendation)
+    return recommendation
+
+
+async def _cached_chat(
+    prompt: str,
+    num_predict: int = RECOMMEND_NUM_PREDICT,
+    stop_on_destructive: bool = False,
+) -> str:
+    """`_chat` behind the response cache – identical prompts skip the model."""
+    prompt_hash = ResponseCache.key(prompt, num_predict)
+    inflight_key = (prompt_hash, stop_on_destructive)
+    pending = _inflight_chats.get(inflight_key)
+    if pending is None:
+        pending = asyncio.ensure_future(
+            _lookup_or_chat(prompt_hash, prompt, num_predict, stop_on_destructive)
         )
+        _inflight_chats[inflight_key] = pending
+        pending.add_done_callback(lambda _: _inflight_chats.pop(inflight_key, None))
+    # Shielded so one cancelled caller doesn't cancel the call for the others
+    return await asyncio.shield(pending)
 
+
+def _review(request: RecommendRequest, recommendation: str) -> RecommendResponse:
+    """Run the safety hook on a generated recommendation and audit‑log it."""
     destructive = _is_destructive(recommendation)
     approved = True  # safe by default
 
@@ -239,20 +678,81 @@ async def recommend(request: RecommendRequest):
     )
 
 
-@app.post("/batch", response_model=BatchResponse)
-async def batch(request: BatchRequest):
-    """Process a list of threats and return a single report."""
+@app.get("/healthz")
+async def healthz():
+    """Readiness probe – 503 until the model is preloaded, or if audit writes fail."""
+    if not getattr(app.state, "model_ready", False):
+        return ORJSONResponse(
+            status_code=503,
+            content={
+                "status": "warming up",
+                "model": MODEL,
+                "num_parallel": OLLAMA_NUM_PARALLEL,
+            },
+        )
+    if not audit_sink.healthy:
+        return ORJSONResponse(
+            status_code=503,
+            content={"status": "audit log failing", "model": MODEL},
+        )
+    return {"status": "ok", "model": MODEL, "num_parallel": OLLAMA_NUM_PARALLEL}
+
+
+@app.post("/recommend", response_model=RecommendResponse)
+async def recommend(request: RecommendRequest):
+    """Generate recommendation for a single threat."""
+    _pre_deny(request)
+    try:
+        # Build the prompt
+        prompt = _generate_prompt(request.threat)
+        # Send to Ollama
+        # Without confirmation a destructive reply is denied anyway, so stop
+        # generating as soon as one shows up.
+        recommendation = await _cached_chat(
+            prompt, stop_on_destructive=not request.confirm
+        )
+    except Exception as exc:
+        logger.error(f"Model error for {request.threat.threat_id}: {exc}")
+        raise HTTPException(
+            status_code=500, detail=f"Model generation failed: {exc}"
+        )
+
+    return _review(request, recommendation)
+
+
+async def _batch_report(request: BatchRequest) -> List[RecommendationResponse]:
+    """Process a list of threats and return one report entry per threat."""
+
+    # Reuse the single‑request logic but always deny destructive actions
+    # in batch mode (to avoid accidental mass deletions).
+    single_requests = [
+        RecommendRequest(threat=threat, confirm=False) for threat in request.threats
+    ]
+    # Build every prompt up‑front, then put all chats in flight together so
+    # Ollama's continuous batching can decode them side by side.
+    prompts = [_generate_prompt(r.threat) for r in single_requests]
+
+    async def _generate(single_request: RecommendRequest, prompt: str) -> str:
+        _pre_deny(single_request)
+        return await _cached_chat(prompt, BATCH_NUM_PREDICT, stop_on_destructive=True)
+
+    generated = await asyncio.gather(
+        *(_generate(r, prompt) for r, prompt in zip(single_requests, prompts)),
+        return_exceptions=True,
+    )
 
     report_entries: List[RecommendationResponse] = []
-    for threat in request.threats:
+    for single_request, result in zip(single_requests, generated):
+        threat = single_request.threat
         try:
-            # Reuse the single‑request logic but always deny destructive actions
-            # in batch mode (to avoid accidental mass deletions).
-            single_request = RecommendRequest(threat=threat, confirm=False)
-            response = await recommend(single_request)  # reuse endpoint logic
-            report_entries.append(
-                RecommendationResponse(**response.dict())
-            )
+            if isinstance(result, HTTPException):
+                raise result
+            if isinstance(result, Exception):
+                logger.error(f"Model error for {threat.threat_id}: {result}")
+                raise HTTPException(
+                    status_code=500, detail=f"Model generation failed: {result}"
+                )
+            report_entries.append(_review(single_request, result))
         except HTTPException as exc:
             # Log the failure but keep going
             logger.warning(f"Batch threat {threat.threat_id} failed: {exc.detail}")
@@ -278,52 +778,146 @@ async def batch(request: BatchRequest):
                 )
             )
 
-    return BatchResponse(report=report_entries)
+    return report_entries
+
+
+# The report is made of models we just built, so skip FastAPI's response
+# re‑validation and serialize it directly; `responses` keeps the schema in
+# the OpenAPI docs.
+@app.post("/batch", responses={200: {"model": BatchResponse}})
+async def batch(request: BatchRequest) -> Response:
+    """Process a list of threats and return a single report."""
+    report_entries = await _batch_report(request)
+    payload = orjson.dumps({"report": [r.model_dump() for r in report_entries]})
+    return Response(content=payload, media_type="application/json")
 
 
 # ----------------------------------------------------------------------
 # CSV Helper – can be used by an external CLI or another service
 # ----------------------------------------------------------------------
-def read_threats_from_csv(csv_path: str) -> List[Threat]:
-    """Parse a CSV where the first column is `threat_id`."""
-    threats: List[Threat] = []
-    with open(csv_path, newline="", encoding="utf-8") as fp:
-        reader = csv.DictReader(fp)
+CSV_READ_BUFFER = 1024 * 1024  # 1 MiB
+
+
+def _cell(row: List[str], index: Optional[int]) -> Optional[str]:
+    """Value of one CSV column, or None if the column is absent or empty."""
+    if index is None or index >= len(row):
+        return None
+    return row[index] or None
+
+
+def read_threats_from_csv(csv_path: str, trusted: bool = False) -> List[Threat]:
+    """
+    Parse a CSV with a header row containing at least `threat_id`
+    (optionally `file_path`, `sha256`, `description`).  Rows are read as
+    plain lists.  By default the whole file is validated in one
+    `THREATS_ADAPTER` pass; pass `trusted=True` only for machine‑generated
+    input to build the models without validation.  Raises `ValueError`
+    naming the file and line when a row fails validation.
+    """
+    records: List[Dict[str, Optional[str]]] = []
+    line_numbers: List[int] = []
+    with open(csv_path, newline="", encoding="utf-8", buffering=CSV_READ_BUFFER) as fp:
+        reader = csv.reader(fp)
+        header = next(reader, None)
+        if header is None:
+            return []
+        columns = {name.strip(): i for i, name in enumerate(header)}
+        if "threat_id" not in columns:
+            raise ValueError(f"{csv_path}: CSV header has no 'threat_id' column")
+        i_id = columns["threat_id"]
+        i_path = columns.get("file_path")
+        i_sha = columns.get("sha256")
+        i_desc = columns.get("description")
         for row in reader:
-            threats.append(Threat(**row))
-    return threats
+            if not row:
+                continue
+            records.append(
+                {
+                    # Required column: keep "" rather than None for blanks
+                    "threat_id": row[i_id] if i_id < len(row) else "",
+                    "file_path": _cell(row, i_path),
+                    "sha256": _cell(row, i_sha),
+                    "description": _cell(row, i_desc),
+                }
+            )
+            line_numbers.append(reader.line_num)
+    if trusted:
+        return [Threat.model_construct(**record) for record in records]
+    try:
+        return THREATS_ADAPTER.validate_python(records)
+    except ValidationError as exc:
+        error = exc.errors()[0]
+        index, *field = error["loc"]
+        raise ValueError(
+            f"{csv_path}: line {line_numbers[index]}: "
+            f"{'.'.join(map(str, field)) or 'row'}: {error['msg']}"
+        ) from exc
 
 
 # ----------------------------------------------------------------------
-# If run locally as `python main.py --batch data.csv`, generate a report
+# If run locally as `python main.py --batch data.csv`, generate a report;
+# `python main.py --serve` runs the API under uvicorn instead.
 # ----------------------------------------------------------------------
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "4"))
+
 if __name__ == "__main__":
     import argparse
     import sys
 
-    parser = argparse.ArgumentParser(description="Batch process a CSV of threats.")
+    parser = argparse.ArgumentParser(description="Batch process a CSV of threats, or serve the API.")
     parser.add_argument(
         "--batch",
         dest="csv_file",
         help="Path to CSV file containing threat data (threat_id, ...).",
     )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run the REST API under uvicorn (uvloop + httptools, WEB_WORKERS processes).",
+    )
+    parser.add_argument("--host", default="0.0.0.0", help="Bind address for --serve.")
+    parser.add_argument("--port", type=int, default=8000, help="Port for --serve.")
     args = parser.parse_args()
 
+    if args.serve:
+        import uvicorn  # pip install "uvicorn[standard]"
+
+        # Every worker is a separate process with its own Ollama client,
+        # cache connection and audit writers, all appending to the same
+        # audit.log.  That is safe for whole‑line appends, but if entries
+        # must be strictly ordered, ship them to one shared sink (syslog /
+        # socket handler) or give each worker its own file, e.g.
+        # `audit.<pid>.log`.  Multiple workers need an import string.
+        uvicorn.run(
+            app if WEB_WORKERS == 1 else f"{Path(__file__).stem}:app",
+            app_dir=str(Path(__file__).resolve().parent),
+            host=args.host,
+            port=args.port,
+            loop="uvloop",
+            http="httptools",
+            workers=WEB_WORKERS,
+            log_level="warning",
+        )
+        sys.exit(0)
+
     if not args.csv_file:
-        print("Error: --batch <csv_file> required when running as a script.", file=sys.stderr)
+        print("Error: --batch <csv_file> or --serve required when running as a script.", file=sys.stderr)
         sys.exit(1)
 
-    threats = read_threats_from_csv(args.csv_file)
+    try:
+        threats = read_threats_from_csv(args.csv_file)
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        sys.exit(1)
     batch_req = BatchRequest(threats=threats)
-    # Reuse the FastAPI endpoint logic without the server
-    from fastapi.testclient import TestClient
 
-    client = TestClient(app)
-    resp = client.post("/batch", json=batch_req.dict())
-    if resp.status_code != 200:
-        print(f"Batch failed: {resp.text}")
-        sys.exit(1)
+    # Reuse the FastAPI endpoint logic without the server (or an HTTP
+    # round‑trip), running the app's startup/shutdown hooks around it.
+    async def _run_batch(req: BatchRequest) -> BatchResponse:
+        async with app.router.lifespan_context(app):
+            return BatchResponse(report=await _batch_report(req))
+
+    report = asyncio.run(_run_batch(batch_req))
 
     # Pretty‑print the report
-    report = resp.json()
-    print(json.dumps(report, indent=2))
+    print(orjson.dumps(report.model_dump(), option=orjson.OPT_INDENT_2).decode())